@@ -1,25 +1,37 @@
-import os
 import re
+import sqlite3
+import time
 from io import BytesIO
 from datetime import datetime
 
 import streamlit as st
-from openai import OpenAI, OpenAIError   # noqa: F401  (kept for completeness)
 
-# ─────────────────────────────────────────  CONFIG  ──────────────────────────────────────────
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    st.error("OPENAI_API_KEY not found. Set it in your environment or Streamlit secrets.")
-    st.stop()
-
-client = OpenAI(api_key=OPENAI_API_KEY)
+from archive import add_record, get_record, search
+from backends import BackendError, get_backend
+from lexicon import count_syllables, find_hard_words, highlight, vocab_report
+from prompts import adapt_messages, questions_messages
+from tokens import adapt_budget, cache_summary, check_fit, questions_budget, usage_row
+from viewer import PAGE_SIZE, align_paragraphs, window_html
 
+# ─────────────────────────────────────────  CONFIG  ──────────────────────────────────────────
 st.set_page_config(
     page_title="Welcome to ReadRight",
     layout="wide",
     initial_sidebar_state="expanded",
 )
 
+
+@st.cache_resource(show_spinner=False)
+def load_backend():
+    """OpenAI by default; READRIGHT_BACKEND=stub|record|replay runs without it."""
+    return get_backend()
+
+try:
+    backend = load_backend()
+except BackendError as err:
+    st.error(str(err))
+    st.stop()
+
 # ──────────────────────────────────────────  CSS  ────────────────────────────────────────────
 st.markdown(
     """
@@ -80,20 +92,7 @@ textarea:focus{
 )
 
 # ──────────────────────────────────────  HELPERS  ────────────────────────────────────────────
-def count_syllables(word: str) -> int:
-    vowels = "aeiouy"
-    word = word.lower()
-    count = 0
-    if word and word[0] in vowels:
-        count += 1
-    for i in range(1, len(word)):
-        if word[i] in vowels and word[i - 1] not in vowels:
-            count += 1
-    if word.endswith("e"):
-        count -= 1
-    return max(count, 1)
-
-
+@st.cache_data(show_spinner=False, max_entries=32, ttl=3600)
 def readability(text: str):
     sentences = re.split(r"[.!?]+", text)
     words = text.split()
@@ -110,21 +109,7 @@ def readability(text: str):
     }
 
 
-_GUIDES = {
-    "Kindergarten": ("3–5 words", "Basic sight words", "Simple S‑V", "Concrete objects"),
-    "1st Grade": ("5–8 words", "Sight + simple descript.", "Basic conj.", "Familiar experiences"),
-    "2nd Grade": ("8–12 words", "Growing sight list", "and/but compounds", "Comparisons, sequence"),
-    "3rd Grade": ("10–15 words", "Academic vocab", "Dep. clauses", "Abstract ideas + examples"),
-    "4th Grade": ("12–18 words", "Subject terms", "Varied structs", "Cause–effect, inference"),
-    "5th Grade": ("15–20 words", "Figurative language", "Sophisticated variety", "Abstract, critical"),
-}
-def guide(grade):  # default for 6‑12
-    return _GUIDES.get(
-        grade,
-        ("Varies", "Grade academic vocab", "Full range", "Abstract / complex"),
-    )
-
-
+@st.cache_data(show_spinner=False, max_entries=4, ttl=3600)
 def history_pdf(records):
     """Return PDF bytes or None if ReportLab unavailable."""
     try:
@@ -157,6 +142,41 @@ def history_pdf(records):
     buf.seek(0)
     return buf.read()
 
+
+@st.cache_data(show_spinner=False, max_entries=16, ttl=3600)
+def cached_vocab_report(original: str, adapted: str, grade: str):
+    return vocab_report(original, adapted, grade)
+
+
+@st.cache_data(show_spinner=False, max_entries=16, ttl=3600)
+def cached_pairs(original: str, adapted: str):
+    return align_paragraphs(original, adapted)
+
+
+@st.cache_data(show_spinner=False, max_entries=16, ttl=3600)
+def preflight(text: str, grade: str, model: str, simplify: bool, define: bool, short_p: bool, breaks: bool):
+    """(max_tokens, estimated prompt tokens, problem) for an adaptation, checked before sending."""
+    msgs = adapt_messages(text, grade, simplify, define, short_p, breaks)
+    budget = adapt_budget(text, grade, model, define, breaks)
+    return (budget, *check_fit(msgs, budget, model))
+
+
+def build_pack(stamp: str, grade: str, model: str, original: str, adapted: str, questions: str) -> str:
+    return f"""GENERATED {stamp}
+GRADE {grade}
+MODEL {model}
+
+ORIGINAL
+--------
+{original}
+
+ADAPTED
+-------
+{adapted}
+
+{"QUESTIONS\n---------\n" + questions if questions else ""}
+"""
+
 # ─────────────────────────────────────────── UI ──────────────────────────────────────────────
 st.markdown(
     """
@@ -172,6 +192,36 @@ st.markdown(
 st.session_state.setdefault("adapted", "")
 st.session_state.setdefault("questions", "")
 st.session_state.setdefault("history", [])
+st.session_state.setdefault("token_log", [])
+st.session_state.setdefault("source", "")      # the text that was adapted
+st.session_state.setdefault("source_grade", "")  # ...and the grade it was adapted for
+st.session_state.setdefault("notices", [])
+st.session_state.setdefault("view_start", 0)   # first paragraph pair shown in the comparison
+st.session_state.setdefault("view_size", PAGE_SIZE)
+st.session_state.setdefault("hl_start", 0)     # same for the highlighted-words view
+st.session_state.setdefault("hl_size", PAGE_SIZE)
+st.session_state.setdefault("tgt_grade", "2nd Grade")
+
+
+def _reset_view():
+    """Back to the first window of both paged views (new or loaded text)."""
+    for prefix in ("view", "hl"):
+        st.session_state[f"{prefix}_start"] = 0
+        st.session_state[f"{prefix}_size"] = PAGE_SIZE
+
+
+# ---- Load an archived adaptation picked in the History tab (before widgets exist) ----
+if "_load_record" in st.session_state:
+    rec = get_record(st.session_state.pop("_load_record"))
+    if rec:
+        st.session_state.text_in = rec["original"]
+        st.session_state.source = rec["original"]
+        st.session_state.source_grade = rec["grade"]
+        st.session_state.adapted = rec["adapted"]
+        st.session_state.questions = rec["questions"]
+        _reset_view()
+        st.session_state.tgt_grade = rec["grade"]
+        st.session_state.notices.append(("success", f"Loaded the {rec['grade']} adaptation from {rec['timestamp']}."))
 
 # ---- Sidebar ----
 with st.sidebar:
@@ -181,7 +231,7 @@ with st.sidebar:
         "5th Grade", "6th Grade", "7th Grade", "8th Grade",
         "9th Grade", "10th Grade", "11th Grade", "12th Grade",
     ]
-    tgt_grade = st.selectbox("Target grade level", GRADES, index=2)
+    tgt_grade = st.selectbox("Target grade level", GRADES, key="tgt_grade")
 
     st.header("AI Settings")
     model_options = {
@@ -202,109 +252,129 @@ with st.sidebar:
     st.header("Output Options")
     make_qs  = st.checkbox("Generate comprehension questions", True)
 
-# ---- Tabs ----
-tab_adapt, tab_metrics, tab_hist = st.tabs(["Adapt Text", "Analytics", "History"])
+# ===========  COMPARISON VIEWER  ===========
+def _view_page(prefix, step):
+    st.session_state[f"{prefix}_start"] = max(0, st.session_state[f"{prefix}_start"] + step)
+
+
+def _view_grow(prefix):
+    st.session_state[f"{prefix}_size"] += PAGE_SIZE
+
+
+def paged_pairs(pairs, grade, prefix="view", mark=None):
+    """One window of aligned pairs plus paging buttons; state lives under `prefix`_start/_size."""
+    total, size = len(pairs), st.session_state[f"{prefix}_size"]
+    start = min(st.session_state[f"{prefix}_start"], max(total - size, 0))
+    stop = min(start + size, total)
+    st.markdown(window_html(pairs, start, stop, grade, mark=mark), unsafe_allow_html=True)
+    if total > size:
+        c1, c2, c3, c4 = st.columns([1, 1, 1, 2])
+        c1.button("◀ Previous", key=f"{prefix}_prev", on_click=_view_page, args=(prefix, -size), disabled=start == 0, use_container_width=True)
+        c2.button("Next ▶", key=f"{prefix}_next", on_click=_view_page, args=(prefix, size), disabled=stop >= total, use_container_width=True)
+        c3.button("Show more", key=f"{prefix}_more", on_click=_view_grow, args=(prefix,), disabled=stop >= total, use_container_width=True)
+        c4.caption(f"Paragraphs {start + 1}–{stop} of {total}")
+
+
+@st.fragment
+def comparison_view(source, adapted, grade):
+    """Aligned paragraph pairs, one window at a time; paging reruns only this view."""
+    paged_pairs(cached_pairs(source, adapted), grade)
+
 
 # ===========  ADAPT TAB  ===========
-with tab_adapt:
+@st.fragment
+def adapt_tab():
     st.subheader("Input text")
     text_in = st.text_area(
         "Paste or type the text you want to adapt",
+        key="text_in",
         height=220,
         placeholder="Enter your text here…",
     )
+    problem = None
+    if text_in.strip():
+        budget, est_prompt, problem = preflight(text_in, tgt_grade, model, simplify, define, short_p, breaks)
+        if problem == "overflow":
+            st.error(f"Input is too long for {model} (~{est_prompt:,} tokens). Shorten the text and try again.")
+        elif problem == "truncate":
+            st.warning(f"Input is ~{est_prompt:,} tokens; the adapted text may be cut off at {budget:,}.")
     left, right = st.columns(2)
-    adapt_btn = left.button("Adapt text", use_container_width=True)
+    adapt_btn = left.button("Adapt text", disabled=problem == "overflow", use_container_width=True)
     if right.button("Clear", use_container_width=True):
-        for k in ("adapted", "questions"):
+        for k in ("adapted", "questions", "source", "source_grade"):
             st.session_state[k] = ""
-        st.experimental_rerun()
+        st.rerun()
 
     if adapt_btn and text_in.strip():
         with st.spinner(f"Adapting text for {tgt_grade} …"):
-            rules = guide(tgt_grade)
-            sys_prompt = f"""
-You are an expert special‑education content specialist.
-
-TARGET: {tgt_grade} students.
-
-GUIDELINES
- • Sentence length: {rules[0]}
- • Vocabulary: {rules[1]}
- • Complexity: {rules[2]}
- • Concepts: {rules[3]}
-
-ACCOMMODATIONS
- {'• Simplify vocabulary'            if simplify else ''}
- {'• Add definitions in parentheses' if define   else ''}
- {'• Short paragraphs (2‑3 sent.)'   if short_p  else ''}
- {'• Visual breaks between ideas'     if breaks   else ''}
- • Clear topic sentences, transitions
- • Active voice; literal language
-
-PRESERVE
- • All key ideas, meaning, purpose
-
-OUTPUT
- • Markdown only (no commentary)
- • **Bold** key terms
- • Bullet lists where useful
- • Short, focused paragraphs
-"""
-            msgs = [
-                {"role": "system", "content": sys_prompt},
-                {"role": "user", "content": f"Adapt this text for {tgt_grade}:\n\n{text_in}"},
-            ]
+            msgs = adapt_messages(text_in, tgt_grade, simplify, define, short_p, breaks)
             try:
-                res = client.chat.completions.create(
+                t0 = time.perf_counter()
+                res = backend.complete(
                     model=model,
                     temperature=0.3,
                     messages=msgs,
-                    max_tokens=2000,
+                    max_tokens=budget,
                 )
+            except BackendError as err:
+                st.error(str(err))
+                st.stop()
             except Exception as err:
-                st.error(f"OpenAI error: {err}")
+                st.error(f"Model error: {err}")
                 raise err
+            ms = (time.perf_counter() - t0) * 1000
+            st.session_state.token_log.append(usage_row("adapt", model, est_prompt, budget, res, ms))
+            if res.choices[0].finish_reason == "length":
+                st.session_state.notices.append(("warning", "The adapted text hit the token limit and may be incomplete."))
             st.session_state.adapted = res.choices[0].message.content.strip()
+            st.session_state.source = text_in
+            st.session_state.source_grade = tgt_grade
+            _reset_view()
 
             if make_qs:
-                q_msgs = [
-                    {"role": "system", "content": "Write clear comprehension questions for the given grade."},
-                    {"role": "user", "content": f"Create 6 questions for {tgt_grade} students based on this text:\n\n{st.session_state.adapted}"},
-                ]
-                q_res = client.chat.completions.create(model=model, temperature=0.3, messages=q_msgs)
-                st.session_state.questions = q_res.choices[0].message.content.strip()
+                q_msgs = questions_messages(st.session_state.adapted, tgt_grade)
+                q_budget = questions_budget(tgt_grade, model)
+                est_q, _ = check_fit(q_msgs, q_budget, model)
+                try:
+                    t0 = time.perf_counter()
+                    q_res = backend.complete(model=model, temperature=0.3, messages=q_msgs, max_tokens=q_budget)
+                except Exception as err:
+                    # keep the adaptation; only the questions are missing
+                    st.session_state.notices.append(("error", f"Model error while writing questions: {err}"))
+                else:
+                    ms = (time.perf_counter() - t0) * 1000
+                    st.session_state.token_log.append(usage_row("questions", model, est_q, q_budget, q_res, ms))
+                    if q_res.choices[0].finish_reason == "length":
+                        st.session_state.notices.append(("warning", "The questions hit the token limit and the list may be incomplete."))
+                    st.session_state.questions = q_res.choices[0].message.content.strip()
 
             # history preview
+            stamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+            try:
+                add_record(stamp, tgt_grade, text_in, st.session_state.adapted, st.session_state.questions)
+            except Exception:
+                pass
             hist = st.session_state.history
             hist.append(
                 {
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
+                    "timestamp": stamp,
                     "grade": tgt_grade,
                     "original": (text_in[:100] + "...") if len(text_in) > 100 else text_in,
                     "adapted": (st.session_state.adapted[:100] + "...") if len(st.session_state.adapted) > 100 else st.session_state.adapted,
                 }
             )
-            st.success("Adaptation complete.")
+            st.session_state.notices.append(("success", "Adaptation complete."))
+        st.rerun()  # refresh the Analytics and History fragments too
 
     # ---- Show results ----
+    for kind, msg in st.session_state.notices:
+        getattr(st, kind)(msg)
+    st.session_state.notices = []
+
     if st.session_state.adapted:
+        source, adapted_grade = st.session_state.source, st.session_state.source_grade
         st.markdown("#### Comparison")
-        st.markdown(
-            f"""
-<div style="display:grid;grid-template-columns:1fr 1fr;gap:24px;">
-  <div style="border:1px solid #d2d2d7;border-radius:12px;padding:20px;height:450px;overflow:auto;">
-      <h5>Original</h5>
-      <div style="white-space:pre-wrap;font-size:15px;">{text_in}</div>
-  </div>
-  <div style="border:1px solid #d2d2d7;border-radius:12px;padding:20px;height:450px;overflow:auto;">
-      <h5>Adapted for {tgt_grade}</h5>
-      <div style="white-space:pre-wrap;font-size:15px;">{st.session_state.adapted}</div>
-  </div>
-</div>
-""",
-            unsafe_allow_html=True,
-        )
+        comparison_view(source, st.session_state.adapted, adapted_grade)
 
         if make_qs and st.session_state.questions:
             st.markdown("#### Comprehension questions")
@@ -312,44 +382,37 @@ OUTPUT
 
         # downloads
         st.markdown("---")
-        pack = f"""GENERATED {datetime.now():%Y-%m-%d %H:%M}
-GRADE {tgt_grade}
-MODEL {model}
-
-ORIGINAL
---------
-{text_in}
-
-ADAPTED
--------
-{st.session_state.adapted}
-
-{"QUESTIONS\n---------\n" + st.session_state.questions if st.session_state.questions else ""}
-"""
+        pack = build_pack(
+            f"{datetime.now():%Y-%m-%d %H:%M}", adapted_grade, model,
+            source, st.session_state.adapted, st.session_state.questions,
+        )
         col1, col2, col3 = st.columns(3)
         col1.download_button(
             "Download adapted text",
             st.session_state.adapted,
-            f"adapted_{tgt_grade}_{datetime.now():%Y%m%d_%H%M}.txt",
+            f"adapted_{adapted_grade}_{datetime.now():%Y%m%d_%H%M}.txt",
             "text/plain",
         )
         if st.session_state.questions:
             col2.download_button(
                 "Download questions",
                 st.session_state.questions,
-                f"questions_{tgt_grade}_{datetime.now():%Y%m%d_%H%M}.txt",
+                f"questions_{adapted_grade}_{datetime.now():%Y%m%d_%H%M}.txt",
                 "text/plain",
             )
         col3.download_button(
             "Download complete package",
             pack,
-            f"package_{tgt_grade}_{datetime.now():%Y%m%d_%H%M}.txt",
+            f"package_{adapted_grade}_{datetime.now():%Y%m%d_%H%M}.txt",
             "text/plain",
         )
 
 # ===========  METRICS TAB  ===========
-with tab_metrics:
+@st.fragment
+def metrics_tab():
     st.subheader("Text analytics")
+    text_in = st.session_state.source
+    grade = st.session_state.source_grade
     if st.session_state.adapted and text_in.strip():
         o = readability(text_in)
         a = readability(st.session_state.adapted)
@@ -360,12 +423,60 @@ with tab_metrics:
             cols[2].markdown(f"""<div class="metric-card"><div class="metric-value">{o['reading_ease']}→{a['reading_ease']}</div><div class="metric-label">Flesch ease</div></div>""", unsafe_allow_html=True)
             drop = round((1 - a['word_count'] / o['word_count']) * 100)
             cols[3].markdown(f"""<div class="metric-card"><div class="metric-value">{drop}%</div><div class="metric-label">Complexity ↓</div></div>""", unsafe_allow_html=True)
+
+        # above-grade vocabulary (local lexicon, no API call)
+        vr = cached_vocab_report(text_in, st.session_state.adapted, grade)
+        st.markdown("#### Above-grade vocabulary")
+        vcols = st.columns(3)
+        vcols[0].markdown(f"""<div class="metric-card"><div class="metric-value">{vr['original_count']}→{vr['adapted_count']}</div><div class="metric-label">Hard words</div></div>""", unsafe_allow_html=True)
+        vcols[1].markdown(f"""<div class="metric-card"><div class="metric-value">{len(vr['defined'])}</div><div class="metric-label">Defined in text</div></div>""", unsafe_allow_html=True)
+        vcols[2].markdown(f"""<div class="metric-card"><div class="metric-value">{len(vr['not_simplified'])}</div><div class="metric-label">Not simplified</div></div>""", unsafe_allow_html=True)
+        if vr["not_simplified"]:
+            st.warning("Still above " + grade + ": " + ", ".join(vr["not_simplified"]))
+        if vr["estimated"]:
+            st.caption("Not in the lexicon, grade estimated from syllables: " + ", ".join(vr["estimated"]))
+        with st.expander("Highlighted words"):
+            paged_pairs(
+                cached_pairs(text_in, st.session_state.adapted),
+                grade,
+                prefix="hl",
+                mark=lambda para: highlight(para, find_hard_words(para, grade)),
+            )
     else:
         st.write("Adapt a text first to view analytics.")
 
+    if st.session_state.token_log:
+        with st.expander("Token usage (estimated vs actual)"):
+            cached, prompt = cache_summary(st.session_state.token_log)
+            if prompt:
+                st.caption(f"Prompt tokens served from the provider cache: {cached:,} of {prompt:,} ({cached / prompt:.0%})")
+            st.table(st.session_state.token_log[-10:])
+
 # ===========  HISTORY TAB  ===========
-with tab_hist:
+@st.fragment
+def history_tab():
     st.subheader("Adaptation history")
+    query = st.text_input(
+        "Search all past adaptations",
+        placeholder="Words from the text, a grade or a date…",
+        key="archive_query",
+    )
+    if query.strip():
+        t0 = time.perf_counter()
+        try:
+            hits = search(query)
+        except sqlite3.Error as err:
+            st.error(f"Archive search failed: {err}")
+            hits = []
+        st.caption(f"{len(hits)} result(s) in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        for hit in hits:
+            c1, c2 = st.columns([6, 1])
+            c1.markdown(f"**{hit['timestamp']} — {hit['grade']}**  \n{hit['snippet']}")
+            if c2.button("Load", key=f"load_{hit['id']}", use_container_width=True):
+                # applied before the widgets are built on the next full run
+                st.session_state["_load_record"] = hit["id"]
+                st.rerun()
+        st.markdown("---")
     hist = st.session_state.history
     if hist:
         pdf = history_pdf(hist)
@@ -385,6 +496,15 @@ with tab_hist:
     else:
         st.write("No history yet – run an adaptation first.")
 
+# ---- Tabs ----
+tab_adapt, tab_metrics, tab_hist = st.tabs(["Adapt Text", "Analytics", "History"])
+with tab_adapt:
+    adapt_tab()
+with tab_metrics:
+    metrics_tab()
+with tab_hist:
+    history_tab()
+
 # ──────────────────────────────────────  FOOTER  ─────────────────────────────────────────────
 st.markdown("---")
 st.markdown(
@@ -0,0 +1,91 @@
+"""
+Full-text archive of every adaptation, backed by SQLite FTS5.
+
+Each adaptation is one row in `adaptations`; triggers keep the external-
+content FTS index in step, so inserts are incremental and searches are
+ranked with bm25.
+"""
+
+import os
+import re
+import sqlite3
+from contextlib import closing
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS adaptations(
+    id        INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    grade     TEXT NOT NULL,
+    original  TEXT NOT NULL,
+    adapted   TEXT NOT NULL,
+    questions TEXT NOT NULL DEFAULT ''
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS adaptations_fts USING fts5(
+    original, adapted, questions, grade, timestamp,
+    content='adaptations', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS adaptations_ai AFTER INSERT ON adaptations BEGIN
+    INSERT INTO adaptations_fts(rowid, original, adapted, questions, grade, timestamp)
+    VALUES (new.id, new.original, new.adapted, new.questions, new.grade, new.timestamp);
+END;
+CREATE TRIGGER IF NOT EXISTS adaptations_ad AFTER DELETE ON adaptations BEGIN
+    INSERT INTO adaptations_fts(adaptations_fts, rowid, original, adapted, questions, grade, timestamp)
+    VALUES ('delete', old.id, old.original, old.adapted, old.questions, old.grade, old.timestamp);
+END;
+"""
+_TERM_RE = re.compile(r"\w+")
+_ready = set()  # archive paths whose schema exists, checked once per process
+
+
+def archive_path() -> str:
+    return os.getenv("READRIGHT_ARCHIVE") or os.path.join(os.path.expanduser("~"), ".readright_archive.db")
+
+
+def _connect(path: str = None):
+    path = path or archive_path()
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    if path not in _ready:
+        conn.executescript(_SCHEMA)
+        _ready.add(path)
+    return conn
+
+
+def add_record(timestamp, grade, original, adapted, questions="", path: str = None) -> int:
+    with closing(_connect(path)) as conn, conn:
+        cur = conn.execute(
+            "INSERT INTO adaptations(timestamp, grade, original, adapted, questions) VALUES (?, ?, ?, ?, ?)",
+            (timestamp, grade, original, adapted, questions or ""),
+        )
+        return cur.lastrowid
+
+
+def to_match(query: str) -> str:
+    """Turn free text into an FTS5 query: every word, prefix-matched."""
+    return " ".join(f'"{t}"*' for t in _TERM_RE.findall(query))
+
+
+def search(query: str, limit: int = 20, path: str = None):
+    """Best matches first, as dicts with a highlighted `snippet`."""
+    match = to_match(query)
+    if not match:
+        return []
+    with closing(_connect(path)) as conn:
+        rows = conn.execute(
+            """
+            SELECT a.id, a.timestamp, a.grade,
+                   snippet(adaptations_fts, -1, '**', '**', ' … ', 12) AS snippet
+            FROM adaptations_fts JOIN adaptations a ON a.id = adaptations_fts.rowid
+            WHERE adaptations_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+            """,
+            (match, limit),
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def get_record(rec_id: int, path: str = None):
+    with closing(_connect(path)) as conn:
+        row = conn.execute("SELECT * FROM adaptations WHERE id = ?", (rec_id,)).fetchone()
+    return dict(row) if row else None
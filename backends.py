@@ -0,0 +1,155 @@
+"""
+Model backends for ReadRight.
+
+The apps only call `backend.complete(model=..., messages=..., ...)` and read
+the OpenAI-shaped response (`choices[0].message.content`, `finish_reason`,
+`usage`). Pick an implementation with READRIGHT_BACKEND:
+
+    openai  (default) the real OpenAI client; needs OPENAI_API_KEY
+    stub    deterministic offline stand-in, no network
+    record  call OpenAI and save every response under READRIGHT_CASSETTES
+    replay  serve saved responses only; a request with no recording fails
+"""
+
+import hashlib
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+
+from prompts import QUESTIONS_SYSTEM
+from tokens import count_messages, count_tokens
+
+
+class BackendError(RuntimeError):
+    pass
+
+
+def _to_obj(value):
+    """JSON-style dicts → attribute access, mirroring the OpenAI response objects."""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _to_obj(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_to_obj(v) for v in value]
+    return value
+
+
+def _response(content: str, finish_reason: str, prompt_tokens: int, completion_tokens: int, model: str):
+    return _to_obj({
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": finish_reason}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        },
+    })
+
+
+class Backend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def complete(self, model, messages, temperature=0.3, max_tokens=None):
+        """One chat completion, returned in the OpenAI response shape."""
+
+
+class OpenAIBackend(Backend):
+    name = "openai"
+
+    def __init__(self, api_key=None):
+        from openai import OpenAI
+
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise BackendError(
+                "OPENAI_API_KEY not found. Set it in your environment or Streamlit secrets, "
+                "or run offline with READRIGHT_BACKEND=stub."
+            )
+        self.client = OpenAI(api_key=api_key)
+
+    def complete(self, model, messages, temperature=0.3, max_tokens=None):
+        kwargs = {"max_tokens": max_tokens} if max_tokens else {}
+        return self.client.chat.completions.create(model=model, temperature=temperature, messages=messages, **kwargs)
+
+
+class StubBackend(Backend):
+    """
+    Offline stand-in with deterministic output: adaptations keep the first
+    two sentences of each paragraph, questions ask about the longest words.
+    """
+
+    name = "stub"
+    _SENT_RE = re.compile(r"(?<=[.!?])\s+")
+
+    def complete(self, model, messages, temperature=0.3, max_tokens=None):
+        user = messages[-1]["content"]
+        if messages[0]["content"] == QUESTIONS_SYSTEM:
+            text = user.split("\n\n", 1)[-1]
+            words = sorted({w.lower() for w in re.findall(r"[A-Za-z]{6,}", text)}, key=lambda w: (-len(w), w))
+            content = "\n".join(
+                f"{i}. What does the text tell us about **{w}**?" for i, w in enumerate(words[:6] or ["the topic"], 1)
+            )
+        else:
+            text = user.split("\nText:\n", 1)[-1]
+            paras = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+            content = "\n\n".join(" ".join(self._SENT_RE.split(p)[:2]) for p in paras)
+        finish = "stop"
+        completion = count_tokens(content, model)
+        if max_tokens and completion > max_tokens:
+            content, completion, finish = content[: max_tokens * 4], max_tokens, "length"
+        prompt = count_messages(messages, model)
+        return _response(content, finish, prompt, completion, model)
+
+
+class RecordReplayBackend(Backend):
+    """
+    Stores one JSON file per request under `store`, keyed by a hash of the
+    model, temperature and messages (max_tokens is left out so recordings
+    survive changes to the token estimator).
+    """
+
+    def __init__(self, store, inner: Backend = None):
+        self.store = store
+        self.inner = inner
+        self.name = "record" if inner else "replay"
+        if inner is not None:
+            os.makedirs(store, exist_ok=True)
+
+    @staticmethod
+    def request_key(model, messages, temperature) -> str:
+        blob = json.dumps({"model": model, "temperature": temperature, "messages": messages}, sort_keys=True)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.store, f"{key}.json")
+
+    def complete(self, model, messages, temperature=0.3, max_tokens=None):
+        key = self.request_key(model, messages, temperature)
+        path = self._path(key)
+        if self.inner is None:
+            if not os.path.exists(path):
+                raise BackendError(f"No recording for this request ({key[:12]}) in {self.store}.")
+            with open(path, encoding="utf-8") as f:
+                return _to_obj(json.load(f)["response"])
+        res = self.inner.complete(model=model, messages=messages, temperature=temperature, max_tokens=max_tokens)
+        data = res.model_dump(mode="json") if hasattr(res, "model_dump") else json.loads(json.dumps(res, default=vars))
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"request": {"model": model, "temperature": temperature, "messages": messages}, "response": data}, f, indent=2)
+        return res
+
+
+def get_backend(kind: str = None) -> Backend:
+    kind = (kind or os.getenv("READRIGHT_BACKEND") or "openai").lower()
+    store = os.getenv("READRIGHT_CASSETTES") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "cassettes")
+    if kind == "openai":
+        return OpenAIBackend()
+    if kind == "stub":
+        return StubBackend()
+    if kind == "record":
+        return RecordReplayBackend(store, inner=OpenAIBackend())
+    if kind == "replay":
+        return RecordReplayBackend(store)
+    raise BackendError(f"Unknown READRIGHT_BACKEND '{kind}' (use openai, stub, record or replay).")
@@ -0,0 +1,60 @@
+"""
+Rerun-latency benchmark for the ReadRight apps.
+
+Adapts one large document with the offline stub backend, then toggles a
+sidebar checkbox repeatedly and times each rerun. No network is used.
+
+    python bench_rerun.py                # app.py and ptapp.py
+    python bench_rerun.py app.py -n 30 --words 40000
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from streamlit.testing.v1 import AppTest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PARAGRAPH = (
+    "Photosynthesis is the process by which green plants use sunlight, water and "
+    "carbon dioxide to produce glucose and oxygen. The ecosystem depends on this "
+    "energy, which flows from producers to consumers and finally to decomposers."
+)
+
+
+def bench(script: str, runs: int, words: int):
+    n_par = max(1, words // len(PARAGRAPH.split()))
+    doc = "\n\n".join([PARAGRAPH] * n_par)
+    at = AppTest.from_file(os.path.join(HERE, script), default_timeout=120)
+    at.run()
+    at.text_area[0].input(doc).run()
+    at.button[0].click().run()
+    box = next(c for c in at.checkbox if c.label == "Add visual breaks")
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        box.set_value(not box.value).run()
+        times.append((time.perf_counter() - t0) * 1000)
+        box = next(c for c in at.checkbox if c.label == "Add visual breaks")
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95) - 1]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("scripts", nargs="*", default=["app.py", "ptapp.py"])
+    ap.add_argument("-n", "--runs", type=int, default=20)
+    ap.add_argument("--words", type=int, default=20_000)
+    args = ap.parse_args()
+
+    os.environ.setdefault("READRIGHT_BACKEND", "stub")
+    os.environ.setdefault("READRIGHT_ARCHIVE", os.path.join(tempfile.mkdtemp(), "bench_archive.db"))
+    for script in args.scripts:
+        med, p95 = bench(script, args.runs, args.words)
+        print(f"{script:<12} {args.words:>7,} words  rerun median {med:7.1f} ms   p95 {p95:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Local hard-vocabulary lexicon for ReadRight.
+
+Loads data/lexicon.tsv once into a character trie and flags words that sit
+above a target grade, in a single pass over the text. Everyday long words are
+in the lexicon too, so a long word it does not rate is a rare one; those get
+a grade estimated from their syllable count instead (names are skipped).
+"""
+
+import html
+import os
+import re
+from functools import lru_cache
+
+GRADES = [
+    "Kindergarten", "1st Grade", "2nd Grade", "3rd Grade", "4th Grade",
+    "5th Grade", "6th Grade", "7th Grade", "8th Grade",
+    "9th Grade", "10th Grade", "11th Grade", "12th Grade",
+]
+
+_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "lexicon.tsv")
+_END = ""  # trie key holding the grade of a complete word
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z'-]*")
+_SUFFIXES = (("'s", ""), ("ies", "y"), ("ied", "y"), ("es", ""), ("s", ""), ("ed", ""),
+             ("ed", "e"), ("ing", ""), ("ing", "e"), ("ily", "y"), ("ly", ""), ("al", ""))
+_INFLECTIONS = ("'s", "ing", "ed", "es", "s", "ly")  # stripped before estimating a grade
+_MIN_ESTIMATED_LEN = 7  # shorter unrated words (e.g. "family") are left alone
+
+
+def grade_index(grade: str) -> int:
+    return GRADES.index(grade) if grade in GRADES else len(GRADES) - 1
+
+
+@lru_cache(maxsize=1)
+def load_trie(path: str = _LEXICON_PATH) -> dict:
+    """Build the trie once per process; values are grade indexes 0–12."""
+    root: dict = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            word, aoa = line.rstrip("\n").split("\t")
+            node = root
+            for ch in word.lower():
+                node = node.setdefault(ch, {})
+            node[_END] = max(0, min(len(GRADES) - 1, int(aoa) - 6))
+    return root
+
+
+def _lookup(trie: dict, word: str):
+    node = trie
+    for ch in word:
+        node = node.get(ch)
+        if node is None:
+            return None
+    return node.get(_END)
+
+
+def count_syllables(word: str) -> int:
+    vowels = "aeiouy"
+    word = word.lower()
+    count = 0
+    if word and word[0] in vowels:
+        count += 1
+    for i in range(1, len(word)):
+        if word[i] in vowels and word[i - 1] not in vowels:
+            count += 1
+    if word.endswith("e"):
+        count -= 1
+    return max(count, 1)
+
+
+def estimated_grade(word: str):
+    """
+    Rough grade index for a word missing from the lexicon: three syllables
+    read as 4th grade, each extra syllable two grades more. Inflections are
+    judged by their stem ("visited" is as easy as "visit"). None for short
+    words.
+    """
+    word = word.lower().strip("'-")
+    for suffix in _INFLECTIONS:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[: -len(suffix)]
+            break
+    syllables = count_syllables(word)
+    if len(word) < _MIN_ESTIMATED_LEN or syllables < 3:
+        return None
+    return min(len(GRADES) - 1, 2 * syllables - 2)
+
+
+def word_grade(word: str, trie: dict = None):
+    """Grade index for a word (or a simple inflection of it), else None."""
+    trie = trie if trie is not None else load_trie()
+    word = word.lower().strip("'-")
+    g = _lookup(trie, word)
+    if g is not None:
+        return g
+    for suffix, repl in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            g = _lookup(trie, word[: -len(suffix)] + repl)
+            if g is not None:
+                return g
+    return None
+
+
+def _is_name(text: str, m) -> bool:
+    """Capitalised word that does not start a sentence (a name, not vocabulary)."""
+    if not m.group()[0].isupper():
+        return False
+    before = text[max(0, m.start() - 8):m.start()].rstrip(" \t*_\"'(")
+    return bool(before) and before[-1] not in ".!?:\n#-•"
+
+
+def find_hard_words(text: str, grade: str):
+    """
+    Return [(start, end, word, word_grade, defined, estimated)] for every
+    word above `grade`. `defined` is True when the word is followed by a
+    parenthesised gloss; `estimated` when the word is not in the lexicon and
+    its grade comes from estimated_grade().
+    """
+    trie = load_trie()
+    limit = grade_index(grade)
+    hits = []
+    for m in _WORD_RE.finditer(text):
+        g = word_grade(m.group(), trie)
+        estimated = g is None
+        if estimated and not _is_name(text, m):
+            g = estimated_grade(m.group())
+        if g is not None and g > limit:
+            defined = text[m.end():m.end() + 6].lstrip("* ").startswith("(")
+            hits.append((m.start(), m.end(), m.group(), g, defined, estimated))
+    return hits
+
+
+def vocab_report(original: str, adapted: str, grade: str):
+    """Compare above-grade vocabulary before and after adaptation."""
+    o_hits = find_hard_words(original, grade)
+    a_hits = find_hard_words(adapted, grade)
+    o_terms = {h[2].lower() for h in o_hits}
+    undefined = {h[2].lower(): h[3] for h in a_hits if not h[4]}
+    defined = {h[2].lower() for h in a_hits if h[4]}
+    return {
+        "original_count": len(o_hits),
+        "adapted_count": len(a_hits),
+        "original_terms": sorted(o_terms),
+        "adapted_terms": sorted({h[2].lower() for h in a_hits}),
+        # kept from the original and still unexplained → not simplified
+        "not_simplified": sorted(t for t in undefined if t in o_terms and t not in defined),
+        "defined": sorted(defined),
+        "estimated": sorted({h[2].lower() for h in a_hits if h[5]}),
+        "a_hits": a_hits,
+        "o_hits": o_hits,
+    }
+
+
+def highlight(text: str, hits) -> str:
+    """HTML-escape `text` and wrap each hit in a <mark> tag."""
+    out, pos = [], 0
+    for start, end, word, g, defined, estimated in hits:
+        out.append(html.escape(text[pos:start]))
+        colour = "#d1f2d9" if defined else "#ffe08a"
+        title = f"~{GRADES[g]} (estimated)" if estimated else GRADES[g]
+        underline = "border-bottom:1px dashed #8a6d00;" if estimated else ""
+        out.append(
+            f'<mark title="{title}" style="background:{colour};border-radius:3px;{underline}">'
+            f"{html.escape(word)}</mark>"
+        )
+        pos = end
+    out.append(html.escape(text[pos:]))
+    return "".join(out)
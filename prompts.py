@@ -0,0 +1,157 @@
+"""
+Prompt templates for ReadRight, laid out for provider-side prompt caching.
+
+Every adaptation request starts with the same long system prompt
+(SYSTEM_PREFIX); only the short per-request header (grade and
+accommodations) and the text itself come after it. The headers for every
+(grade, simplify, define, short_p, breaks) combination are built once at
+import.
+"""
+
+from itertools import product
+
+from lexicon import GRADES
+
+_GUIDES = {
+    "Kindergarten": ("3–5 words", "Basic sight words", "Simple S-V", "Concrete objects"),
+    "1st Grade": ("5–8 words", "Sight + simple descript.", "Basic conj.", "Familiar experiences"),
+    "2nd Grade": ("8–12 words", "Growing sight list", "and/but compounds", "Comparisons, sequence"),
+    "3rd Grade": ("10–15 words", "Academic vocab", "Dep. clauses", "Abstract ideas + examples"),
+    "4th Grade": ("12–18 words", "Subject terms", "Varied structs", "Cause–effect, inference"),
+    "5th Grade": ("15–20 words", "Figurative language", "Sophisticated variety", "Abstract, critical"),
+}
+_DEFAULT_GUIDE = ("Varies", "Grade academic vocab", "Full range", "Abstract / complex")  # 6–12
+
+
+def guide(grade):
+    return _GUIDES.get(grade, _DEFAULT_GUIDE)
+
+
+_ACCOMMODATIONS = (
+    ("simplify", "Simplify vocabulary", "Replace words above the target grade with common words a student at that grade already knows."),
+    ("define", "Add definitions in parentheses", "Keep essential subject terms and follow the first use of each with a short, plain definition in parentheses."),
+    ("short_p", "Short paragraphs (2-3 sent.)", "Keep every paragraph to two or three sentences."),
+    ("breaks", "Visual breaks between ideas", "Separate each main idea with a horizontal rule (---) or a short heading."),
+)
+
+_GRADE_TABLE = "\n".join(
+    f" • {g}: sentences {s}; vocabulary: {v}; complexity: {c}; concepts: {k}"
+    for g in GRADES
+    for s, v, c, k in [guide(g)]
+)
+_ACCOMMODATION_TABLE = "\n".join(f" • {label}: {how}" for _, label, how in _ACCOMMODATIONS)
+
+SYSTEM_PREFIX = f"""
+You are an expert special-education content specialist. You rewrite instructional
+texts so that students at a given grade level can read them independently, while
+keeping every key idea of the original.
+
+HOW REQUESTS ARE STRUCTURED
+Each request ends with a short header naming the TARGET grade and the
+ACCOMMODATIONS that are switched on, followed by the text to adapt. Apply the
+grade guidelines below for the target grade and only the accommodations listed
+in the header.
+
+GRADE GUIDELINES
+{_GRADE_TABLE}
+
+ACCOMMODATIONS (apply only those listed in the request header)
+{_ACCOMMODATION_TABLE}
+
+ALWAYS
+ • Clear topic sentences, transitions
+ • Active voice; literal language
+ • Explain idioms and figures of speech in plain words, or remove them
+ • Keep numbers, names, dates and quantities exactly as in the original
+ • Keep the original order of ideas
+
+PRESERVE
+ • All key ideas, meaning, purpose
+ • Subject terms the lesson is about (define them instead of dropping them)
+
+OUTPUT
+ • Markdown only (no commentary, no preamble, no closing remarks)
+ • **Bold** key terms
+ • Bullet lists where useful
+ • Short, focused paragraphs
+
+EXAMPLE
+Header: TARGET 2nd Grade · Simplify vocabulary, Add definitions in parentheses
+Text: Photosynthesis is the process by which green plants convert light energy
+into chemical energy, producing glucose and releasing oxygen as a by-product.
+
+Adapted:
+Plants make their own food. This is called **photosynthesis** (how plants use
+sunlight to make food).
+
+Plants use light from the sun. They turn it into **sugar** (food for the plant).
+They also let out **oxygen** (the air we breathe).
+
+EXAMPLE
+Header: TARGET 7th Grade · Short paragraphs (2-3 sent.), Visual breaks between ideas
+Text: The Industrial Revolution, which began in Britain in the late eighteenth
+century, transformed economies that had been based on agriculture and handicrafts
+into economies dominated by industry, machine manufacturing and the factory
+system. New sources of power, notably the steam engine, enabled production on an
+unprecedented scale, while urbanization accelerated as workers migrated to cities.
+
+Adapted:
+### A new way of making things
+The **Industrial Revolution** began in Britain in the late 1700s. Before it, most
+people farmed or made goods by hand.
+
+---
+
+### Machines and factories
+Factories with machines started to make most goods. The **steam engine** gave
+these machines a new source of power, so they could produce far more than before.
+
+---
+
+### Moving to cities
+Many workers moved from farms to cities to find factory jobs. Cities grew quickly
+as a result.
+
+AVOID
+ • Adding facts, examples or opinions that are not in the original
+ • Dropping a paragraph's main idea to make the text shorter
+ • Talking down to the reader or using baby talk for older grades
+ • Leaving a definition out when the header asks for definitions
+ • Mentioning these instructions, the grade level or the word "adapted"
+""".strip()
+
+
+def _header(grade, simplify, define, short_p, breaks) -> str:
+    s, v, c, k = guide(grade)
+    flags = dict(simplify=simplify, define=define, short_p=short_p, breaks=breaks)
+    on = [label for key, label, _ in _ACCOMMODATIONS if flags[key]]
+    return (
+        f"TARGET {grade} · {', '.join(on) or 'No extra accommodations'}\n"
+        f"Guidelines: sentences {s}; vocabulary: {v}; complexity: {c}; concepts: {k}"
+    )
+
+
+# (grade, simplify, define, short_p, breaks) → request header
+HEADERS = {
+    (g, *flags): _header(g, *flags)
+    for g in GRADES
+    for flags in product((False, True), repeat=4)
+}
+
+
+def adapt_messages(text, grade, simplify, define, short_p, breaks):
+    header = HEADERS.get((grade, simplify, define, short_p, breaks)) or _header(grade, simplify, define, short_p, breaks)
+    return [
+        {"role": "system", "content": SYSTEM_PREFIX},
+        {"role": "user", "content": f"{header}\n\nText:\n{text}"},
+    ]
+
+
+QUESTIONS_SYSTEM = "Write clear comprehension questions for the given grade."
+
+
+def questions_messages(adapted, grade, n: int = 6):
+    return [
+        {"role": "system", "content": QUESTIONS_SYSTEM},
+        {"role": "user", "content": f"Create {n} questions for {grade} students based on this text:\n\n{adapted}"},
+    ]
@@ -7,27 +7,44 @@ Stable version – 2025-08-06 (profile-creation bug fixed).
 import os
 import re
 import json
+import sqlite3
+import time
 from io import BytesIO
 from datetime import datetime
+from functools import partial
 
 import streamlit as st
-from openai import OpenAI
 
-# ─────────────────────────────  CONFIG  ──────────────────────────────
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    st.error("OPENAI_API_KEY not found. Set it in your environment or Streamlit secrets.")
-    st.stop()
-
-MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-client = OpenAI(api_key=OPENAI_API_KEY)
+from archive import add_record, get_record, search
+from backends import BackendError, get_backend
+from lexicon import count_syllables, find_hard_words, highlight, vocab_report
+from prompts import adapt_messages, questions_messages
+from roster import adapt_roster, group_profiles
+from tokens import adapt_budget, cache_summary, check_fit, questions_budget, usage_row
+from viewer import PAGE_SIZE, align_paragraphs, preview, window_html
 
+# ─────────────────────────────  CONFIG  ──────────────────────────────
 st.set_page_config(
     page_title="Welcome to ReadRight",
     layout="wide",
     initial_sidebar_state="expanded",
 )
 
+
+@st.cache_resource(show_spinner=False)
+def load_backend():
+    """OpenAI by default; READRIGHT_BACKEND=stub|record|replay runs without it."""
+    return get_backend()
+
+try:
+    backend = load_backend()
+except BackendError as err:
+    st.error(str(err))
+    st.stop()
+
+MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+ROSTER_PREVIEW = 1500   # characters of each class's text shown in the roster list
+
 # ─────────────────────────────  CSS  ──────────────────────────────
 st.markdown(
     """
@@ -52,20 +69,7 @@ st.markdown(
 )
 
 # ─────────────────────────  HELPERS  ────────────────────────────
-def count_syllables(word: str) -> int:
-    vowels = "aeiouy"
-    word = word.lower()
-    count = 0
-    if word and word[0] in vowels:
-        count += 1
-    for i in range(1, len(word)):
-        if word[i] in vowels and word[i - 1] not in vowels:
-            count += 1
-    if word.endswith("e"):
-        count -= 1
-    return max(count, 1)
-
-
+@st.cache_data(show_spinner=False, max_entries=32, ttl=3600)
 def readability(text: str):
     sentences = re.split(r"[.!?]+", text)
     words = text.split()
@@ -82,21 +86,77 @@ def readability(text: str):
     }
 
 
-_GUIDES = {
-    "Kindergarten": ("3–5 words", "Basic sight words", "Simple S-V", "Concrete objects"),
-    "1st Grade": ("5–8 words", "Sight + simple descript.", "Basic conj.", "Familiar experiences"),
-    "2nd Grade": ("8–12 words", "Growing sight list", "and/but compounds", "Comparisons, sequence"),
-    "3rd Grade": ("10–15 words", "Academic vocab", "Dep. clauses", "Abstract ideas + examples"),
-    "4th Grade": ("12–18 words", "Subject terms", "Varied structs", "Cause–effect, inference"),
-    "5th Grade": ("15–20 words", "Figurative language", "Sophisticated variety", "Abstract, critical"),
-}
-def guide(grade):
-    return _GUIDES.get(
-        grade,
-        ("Varies", "Grade academic vocab", "Full range", "Abstract / complex"),
+
+def plan_adaptation(text, grade, define, short_p, breaks):
+    """(messages, max_tokens, estimated prompt tokens, problem) for one adaptation."""
+    msgs = adapt_messages(text, grade, False, define, short_p, breaks)
+    budget = adapt_budget(text, grade, MODEL, define, breaks)
+    return (msgs, budget, *check_fit(msgs, budget, MODEL))
+
+
+@st.cache_data(show_spinner=False, max_entries=16, ttl=3600)
+def preflight(text, grade, define, short_p, breaks):
+    """plan_adaptation()'s budget check, cached so the warning costs nothing on reruns."""
+    return plan_adaptation(text, grade, define, short_p, breaks)[1:]
+
+
+def run_adaptation(text, grade, define, short_p, breaks):
+    """
+    Adapt `text` for one set of settings and write its questions.
+    Touches no Streamlit state, so roster workers can call it from threads.
+    Returns {"adapted", "questions", "usage", "notices"}; raises ValueError
+    when the input will not fit the model context (the UI warns about that,
+    and about likely truncation, before anything is sent).
+    """
+    msgs, budget, est_prompt, problem = plan_adaptation(text, grade, define, short_p, breaks)
+    if problem == "overflow":
+        raise ValueError(f"Input is too long for {MODEL} (~{est_prompt:,} tokens). Shorten the text and try again.")
+    notices = []
+    t0 = time.perf_counter()
+    res = backend.complete(
+        model=MODEL,
+        temperature=0.3,
+        messages=msgs,
+        max_tokens=budget,
     )
+    usage = [usage_row("adapt", MODEL, est_prompt, budget, res, (time.perf_counter() - t0) * 1000)]
+    if res.choices[0].finish_reason == "length":
+        notices.append(("warning", "The adapted text hit the token limit and may be incomplete."))
+    adapted = res.choices[0].message.content.strip()
+
+    # Generate comprehension questions
+    q_msgs = questions_messages(adapted, grade)
+    q_budget = questions_budget(grade, MODEL)
+    est_q, _ = check_fit(q_msgs, q_budget, MODEL)
+    questions = ""
+    try:
+        t0 = time.perf_counter()
+        q_res = backend.complete(model=MODEL, temperature=0.3, messages=q_msgs, max_tokens=q_budget)
+    except Exception as err:
+        # keep the adaptation; only the questions are missing
+        notices.append(("error", f"Model error while writing questions: {err}"))
+    else:
+        usage.append(usage_row("questions", MODEL, est_q, q_budget, q_res, (time.perf_counter() - t0) * 1000))
+        if q_res.choices[0].finish_reason == "length":
+            notices.append(("warning", "The questions hit the token limit and the list may be incomplete."))
+        questions = q_res.choices[0].message.content.strip()
+    return {
+        "adapted": adapted,
+        "questions": questions,
+        "usage": usage,
+        "notices": notices,
+    }
 
 
+def archive_record(rec, questions=""):
+    """Index a history record in the full-text archive; never fails an adaptation."""
+    try:
+        add_record(rec["timestamp"], rec["grade"], rec["original"], rec["adapted"], questions)
+    except Exception:
+        pass
+
+
+@st.cache_data(show_spinner=False, max_entries=4, ttl=3600)
 def history_pdf(records):
     try:
         from reportlab.lib.pagesizes import letter
@@ -128,10 +188,46 @@ def history_pdf(records):
     buf.seek(0)
     return buf.read()
 
+
+@st.cache_data(show_spinner=False, max_entries=16, ttl=3600)
+def cached_vocab_report(original: str, adapted: str, grade: str):
+    return vocab_report(original, adapted, grade)
+
+
+@st.cache_data(show_spinner=False, max_entries=16, ttl=3600)
+def cached_pairs(original: str, adapted: str):
+    return align_paragraphs(original, adapted)
+
+
+def build_pack(stamp: str, grade: str, model: str, original: str, adapted: str, questions: str) -> str:
+    return f"""GENERATED {stamp}
+GRADE {grade}
+MODEL {model}
+
+ORIGINAL
+--------
+{original}
+
+ADAPTED
+-------
+{adapted}
+
+{"QUESTIONS\n---------\n" + questions if questions else ""}
+"""
+
 # ─────────────────────────  SESSION DEFAULTS  ─────────────────────────
 st.session_state.setdefault("adapted", "")
+st.session_state.setdefault("source", "")      # the text that was adapted
+st.session_state.setdefault("source_grade", "")  # ...and the grade it was adapted for
+st.session_state.setdefault("notices", [])
+st.session_state.setdefault("view_start", 0)   # first paragraph pair shown in the comparison
+st.session_state.setdefault("view_size", PAGE_SIZE)
+st.session_state.setdefault("hl_start", 0)     # same for the highlighted-words view
+st.session_state.setdefault("hl_size", PAGE_SIZE)
+st.session_state.setdefault("roster", [])      # [(settings, student names, result)]
 st.session_state.setdefault("questions", "")
 st.session_state.setdefault("history", [])
+st.session_state.setdefault("token_log", [])
 
 # Widget defaults
 st.session_state.setdefault("tgt_grade_slider", "2nd Grade")
@@ -140,9 +236,6 @@ st.session_state.setdefault("opt_shortp", True)
 st.session_state.setdefault("opt_breaks", False)
 
 # ─────────────────────────  PROFILE PERSISTENCE  ─────────────────────────
-if "profiles" not in st.session_state:
-    st.session_state.profiles = []
-
 def _profiles_path() -> str:
     home = os.path.expanduser("~")
     return os.path.join(home, ".readright_profiles.json")
@@ -161,7 +254,11 @@ def load_profiles():
                 st.session_state.profiles = json.load(f)
     except Exception:
         pass
-load_profiles()
+
+# read the profile file once per session, not on every rerun
+if "profiles" not in st.session_state:
+    st.session_state.profiles = []
+    load_profiles()
 
 # ─────────────────────────  HANDLE PENDING PROFILE SELECTION ─────────────────────────
 # If the previous run asked us to switch the selectbox's value, do it *before* widgets are created
@@ -169,6 +266,27 @@ if "_next_profile_select" in st.session_state:
     st.session_state.profile_select = st.session_state["_next_profile_select"]
     del st.session_state["_next_profile_select"]
 
+
+def _reset_view():
+    """Back to the first window of both paged views (new or loaded text)."""
+    for prefix in ("view", "hl"):
+        st.session_state[f"{prefix}_start"] = 0
+        st.session_state[f"{prefix}_size"] = PAGE_SIZE
+
+
+# ---- Load an archived adaptation picked in the History tab (before widgets exist) ----
+if "_load_record" in st.session_state:
+    rec = get_record(st.session_state.pop("_load_record"))
+    if rec:
+        st.session_state.text_in = rec["original"]
+        st.session_state.source = rec["original"]
+        st.session_state.source_grade = rec["grade"]
+        st.session_state.adapted = rec["adapted"]
+        st.session_state.questions = rec["questions"]
+        _reset_view()
+        st.session_state.tgt_grade_slider = rec["grade"]
+        st.session_state.notices.append(("success", f"Loaded the {rec['grade']} adaptation from {rec['timestamp']}."))
+
 # ─────────────────────────  SIDEBAR & PROFILE CALLBACK  ─────────────────────────
 GRADES = [
     "Kindergarten", "1st Grade", "2nd Grade", "3rd Grade", "4th Grade",
@@ -221,7 +339,7 @@ with st.sidebar:
                     st.success(f"Profile '{name}' saved.")
                     # ask next run to preselect this profile
                     st.session_state["_next_profile_select"] = new_prof["name"]
-                    st.experimental_rerun()
+                    st.rerun()
                 else:
                     st.error("Name cannot be empty.")
 
@@ -250,106 +368,145 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# ─────────────────────────  TABS  ─────────────────────────
-tab_adapt, tab_metrics, tab_hist = st.tabs(["Adapt Text", "Analytics", "History"])
+# ===========  COMPARISON VIEWER  ===========
+def _view_page(prefix, step):
+    st.session_state[f"{prefix}_start"] = max(0, st.session_state[f"{prefix}_start"] + step)
+
+
+def _view_grow(prefix):
+    st.session_state[f"{prefix}_size"] += PAGE_SIZE
+
+
+def paged_pairs(pairs, grade, prefix="view", mark=None):
+    """One window of aligned pairs plus paging buttons; state lives under `prefix`_start/_size."""
+    total, size = len(pairs), st.session_state[f"{prefix}_size"]
+    start = min(st.session_state[f"{prefix}_start"], max(total - size, 0))
+    stop = min(start + size, total)
+    st.markdown(window_html(pairs, start, stop, grade, mark=mark), unsafe_allow_html=True)
+    if total > size:
+        c1, c2, c3, c4 = st.columns([1, 1, 1, 2])
+        c1.button("◀ Previous", key=f"{prefix}_prev", on_click=_view_page, args=(prefix, -size), disabled=start == 0, use_container_width=True)
+        c2.button("Next ▶", key=f"{prefix}_next", on_click=_view_page, args=(prefix, size), disabled=stop >= total, use_container_width=True)
+        c3.button("Show more", key=f"{prefix}_more", on_click=_view_grow, args=(prefix,), disabled=stop >= total, use_container_width=True)
+        c4.caption(f"Paragraphs {start + 1}–{stop} of {total}")
+
+
+@st.fragment
+def comparison_view(source, adapted, grade):
+    """Aligned paragraph pairs, one window at a time; paging reruns only this view."""
+    paged_pairs(cached_pairs(source, adapted), grade)
+
 
 # ===========  ADAPT TAB  ===========
-with tab_adapt:
+@st.fragment
+def adapt_tab():
     st.subheader("Input text")
     text_in = st.text_area(
         "Paste or type the text you want to adapt",
+        key="text_in",
         height=220,
         placeholder="Enter your text here…",
     )
+    problem = None
+    if text_in.strip():
+        budget, est_prompt, problem = preflight(text_in, tgt_grade, define, short_p, breaks)
+        if problem == "overflow":
+            st.error(f"Input is too long for {MODEL} (~{est_prompt:,} tokens). Shorten the text and try again.")
+        elif problem == "truncate":
+            st.warning(f"Input is ~{est_prompt:,} tokens; the adapted text may be cut off at {budget:,}.")
     left, right = st.columns(2)
-    adapt_btn = left.button("Adapt text", use_container_width=True)
+    adapt_btn = left.button("Adapt text", disabled=problem == "overflow", use_container_width=True)
     if right.button("Clear", use_container_width=True):
-        for k in ("adapted", "questions"):
+        for k in ("adapted", "questions", "source", "source_grade"):
             st.session_state[k] = ""
-        st.experimental_rerun()
+        st.session_state.roster = []
+        st.rerun()
+
+    roster_btn = False
+    if st.session_state.profiles:
+        n_students = len(st.session_state.profiles)
+        groups = group_profiles(st.session_state.profiles)
+        cut_off = []
+        if text_in.strip():
+            cut_off = [key[0] for key in groups if preflight(text_in, *key)[2] == "truncate"]
+        if cut_off and problem != "overflow":
+            st.warning(f"For {', '.join(sorted(set(cut_off), key=GRADES.index))} the adapted text may be cut off.")
+        roster_btn = st.button(
+            f"Adapt for my whole roster ({n_students} students, {len(groups)} distinct settings)",
+            disabled=problem == "overflow",
+            use_container_width=True,
+        )
 
     if adapt_btn and text_in.strip():
         with st.spinner(f"Adapting text for {tgt_grade} …"):
-            rules = guide(tgt_grade)
-            sys_prompt = f"""
-You are an expert special-education content specialist.
-
-TARGET: {tgt_grade} students.
-
-GUIDELINES
- • Sentence length: {rules[0]}
- • Vocabulary: {rules[1]}
- • Complexity: {rules[2]}
- • Concepts: {rules[3]}
-
-ACCOMMODATIONS
- {'• Add definitions in parentheses' if define   else ''}
- {'• Short paragraphs (2-3 sent.)'   if short_p else ''}
- {'• Visual breaks between ideas'    if breaks  else ''}
- • Clear topic sentences, transitions
- • Active voice; literal language
-
-PRESERVE
- • All key ideas, meaning, purpose
-
-OUTPUT
- • Markdown only (no commentary)
- • **Bold** key terms
- • Bullet lists where useful
- • Short, focused paragraphs
-"""
-            msgs = [
-                {"role": "system", "content": sys_prompt},
-                {"role": "user", "content": f"Adapt this text for {tgt_grade}:\n\n{text_in}"},
-            ]
             try:
-                res = client.chat.completions.create(
-                    model=MODEL,
-                    temperature=0.3,
-                    messages=msgs,
-                    max_tokens=2000,
-                )
+                out = run_adaptation(text_in, tgt_grade, define, short_p, breaks)
+            except (ValueError, BackendError) as err:
+                st.error(str(err))
+                st.stop()
             except Exception as err:
-                st.error(f"OpenAI error: {err}")
+                st.error(f"Model error: {err}")
                 raise err
-            st.session_state.adapted = res.choices[0].message.content.strip()
-
-            # Generate comprehension questions
-            q_msgs = [
-                {"role": "system", "content": "Write clear comprehension questions for the given grade."},
-                {"role": "user", "content": f"Create 6 questions for {tgt_grade} students based on this text:\n\n{st.session_state.adapted}"},
-            ]
-            q_res = client.chat.completions.create(model=MODEL, temperature=0.3, messages=q_msgs)
-            st.session_state.questions = q_res.choices[0].message.content.strip()
-
-            st.session_state.history.append(
-                {
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                    "grade": tgt_grade,
-                    "original": text_in,
-                    "adapted": st.session_state.adapted,
-                }
+            st.session_state.token_log.extend(out["usage"])
+            st.session_state.notices.extend(out["notices"])
+            st.session_state.adapted = out["adapted"]
+            st.session_state.questions = out["questions"]
+            st.session_state.source = text_in
+            st.session_state.source_grade = tgt_grade
+            _reset_view()
+
+            rec = {
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
+                "grade": tgt_grade,
+                "original": text_in,
+                "adapted": st.session_state.adapted,
+            }
+            st.session_state.history.append(rec)
+            archive_record(rec, st.session_state.questions)
+            st.session_state.notices.append(("success", "Adaptation complete."))
+        st.rerun()  # refresh the Analytics and History fragments too
+
+    if roster_btn and text_in.strip():
+        profiles = st.session_state.profiles
+        with st.spinner(f"Adapting text for {len(profiles)} students …"):
+            per_student, per_class = adapt_roster(profiles, partial(run_adaptation, text_in))
+        groups = group_profiles(profiles)
+        failed = [key for key, out in per_class.items() if isinstance(out, Exception)]
+        for key, out in per_class.items():
+            if isinstance(out, Exception):
+                st.session_state.notices.append(("error", f"{key[0]} ({', '.join(groups[key])}): {out}"))
+                continue
+            st.session_state.token_log.extend(out["usage"])
+            st.session_state.notices.extend(out["notices"])
+            rec = {
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
+                "grade": key[0],
+                "original": text_in,
+                "adapted": out["adapted"],
+            }
+            st.session_state.history.append(rec)
+            archive_record(rec, out["questions"])
+        st.session_state.roster = [(key, names, per_class[key]) for key, names in groups.items()]
+        done = len(per_class) - len(failed)
+        n_done = sum(len(groups[key]) for key in per_class if key not in failed)
+        calls = sum(len(out["usage"]) for key, out in per_class.items() if key not in failed)
+        if failed:
+            st.session_state.notices.append(
+                ("warning", f"Adapted for {n_done} of {len(per_student)} students; {len(failed)} of {len(per_class)} settings failed.")
             )
-            st.success("Adaptation complete.")
+        else:
+            st.session_state.notices.append(("success", f"Adapted for {n_done} students in {done} distinct settings ({calls} model calls)."))
+        st.rerun()
 
     # ---- Show results ----
+    for kind, msg in st.session_state.notices:
+        getattr(st, kind)(msg)
+    st.session_state.notices = []
+
     if st.session_state.adapted:
+        source, adapted_grade = st.session_state.source, st.session_state.source_grade
         st.markdown("#### Comparison")
-        st.markdown(
-            f"""
-<div style="display:grid;grid-template-columns:1fr 1fr;gap:24px;">
-  <div style="border:1px solid #d2d2d7;border-radius:12px;padding:20px;height:450px;overflow:auto;">
-      <h5>Original</h5>
-      <div style="white-space:pre-wrap;font-size:15px;">{text_in}</div>
-  </div>
-  <div style="border:1px solid #d2d2d7;border-radius:12px;padding:20px;height:450px;overflow:auto;">
-      <h5>Adapted for {tgt_grade}</h5>
-      <div style="white-space:pre-wrap;font-size:15px;">{st.session_state.adapted}</div>
-  </div>
-</div>
-""",
-            unsafe_allow_html=True,
-        )
+        comparison_view(source, st.session_state.adapted, adapted_grade)
 
         if st.session_state.questions:
             st.markdown("#### Comprehension questions")
@@ -357,44 +514,62 @@ OUTPUT
 
         # ---- Downloads ----
         st.markdown("---")
-        pack = f"""GENERATED {datetime.now():%Y-%m-%d %H:%M}
-GRADE {tgt_grade}
-MODEL {MODEL}
-
-ORIGINAL
---------
-{text_in}
-
-ADAPTED
--------
-{st.session_state.adapted}
-
-{"QUESTIONS\n---------\n" + st.session_state.questions if st.session_state.questions else ""}
-"""
+        pack = build_pack(
+            f"{datetime.now():%Y-%m-%d %H:%M}", adapted_grade, MODEL,
+            source, st.session_state.adapted, st.session_state.questions,
+        )
         col1, col2, col3 = st.columns(3)
         col1.download_button(
             "Download adapted text",
             st.session_state.adapted,
-            f"adapted_{tgt_grade}_{datetime.now():%Y%m%d_%H%M}.txt",
+            f"adapted_{adapted_grade}_{datetime.now():%Y%m%d_%H%M}.txt",
             "text/plain",
         )
         if st.session_state.questions:
             col2.download_button(
                 "Download questions",
                 st.session_state.questions,
-                f"questions_{tgt_grade}_{datetime.now():%Y%m%d_%H%M}.txt",
+                f"questions_{adapted_grade}_{datetime.now():%Y%m%d_%H%M}.txt",
                 "text/plain",
             )
         col3.download_button(
             "Download complete package",
             pack,
-            f"package_{tgt_grade}_{datetime.now():%Y%m%d_%H%M}.txt",
+            f"package_{adapted_grade}_{datetime.now():%Y%m%d_%H%M}.txt",
             "text/plain",
         )
 
+    # ---- Roster results ----
+    if st.session_state.roster:
+        st.markdown("#### Roster")
+        for (grade, p_define, p_short, p_breaks), names, out in st.session_state.roster:
+            opts = [label for label, on in (
+                ("definitions", p_define), ("short paragraphs", p_short), ("visual breaks", p_breaks)
+            ) if on]
+            with st.expander(f"{grade} · {', '.join(opts) or 'no accommodations'} — {', '.join(names)}"):
+                if isinstance(out, Exception):
+                    st.error(f"Model error: {out}")
+                    continue
+                # a preview only: each class's full text is in its download
+                st.markdown(preview(out["adapted"], ROSTER_PREVIEW))
+                if len(out["adapted"]) > ROSTER_PREVIEW:
+                    st.caption(f"Showing the first {ROSTER_PREVIEW:,} characters; download for the full text.")
+                st.markdown("**Comprehension questions**")
+                st.markdown(out["questions"])
+                st.download_button(
+                    "Download for these students",
+                    f"STUDENTS {', '.join(names)}\n\n{out['adapted']}\n\nQUESTIONS\n---------\n{out['questions']}",
+                    f"adapted_{grade}_{len(names)}students_{datetime.now():%Y%m%d_%H%M}.txt",
+                    "text/plain",
+                    key=f"roster_dl_{grade}_{p_define}_{p_short}_{p_breaks}",
+                )
+
 # ===========  METRICS TAB  ===========
-with tab_metrics:
+@st.fragment
+def metrics_tab():
     st.subheader("Text analytics")
+    text_in = st.session_state.source
+    grade = st.session_state.source_grade
     if st.session_state.adapted and text_in.strip():
         o = readability(text_in)
         a = readability(st.session_state.adapted)
@@ -417,12 +592,69 @@ with tab_metrics:
                 f"""<div class="metric-card"><div class="metric-value">{drop}%</div><div class="metric-label">Complexity ↓</div></div>""",
                 unsafe_allow_html=True,
             )
+
+        # ---- Above-grade vocabulary (local lexicon, no API call) ----
+        vr = cached_vocab_report(text_in, st.session_state.adapted, grade)
+        st.markdown("#### Above-grade vocabulary")
+        vcols = st.columns(3)
+        vcols[0].markdown(
+            f"""<div class="metric-card"><div class="metric-value">{vr['original_count']}→{vr['adapted_count']}</div><div class="metric-label">Hard words</div></div>""",
+            unsafe_allow_html=True,
+        )
+        vcols[1].markdown(
+            f"""<div class="metric-card"><div class="metric-value">{len(vr['defined'])}</div><div class="metric-label">Defined in text</div></div>""",
+            unsafe_allow_html=True,
+        )
+        vcols[2].markdown(
+            f"""<div class="metric-card"><div class="metric-value">{len(vr['not_simplified'])}</div><div class="metric-label">Not simplified</div></div>""",
+            unsafe_allow_html=True,
+        )
+        if vr["not_simplified"]:
+            st.warning("Still above " + grade + ": " + ", ".join(vr["not_simplified"]))
+        if vr["estimated"]:
+            st.caption("Not in the lexicon, grade estimated from syllables: " + ", ".join(vr["estimated"]))
+        with st.expander("Highlighted words"):
+            paged_pairs(
+                cached_pairs(text_in, st.session_state.adapted),
+                grade,
+                prefix="hl",
+                mark=lambda para: highlight(para, find_hard_words(para, grade)),
+            )
     else:
         st.write("Adapt a text first to view analytics.")
 
+    if st.session_state.token_log:
+        with st.expander("Token usage (estimated vs actual)"):
+            cached, prompt = cache_summary(st.session_state.token_log)
+            if prompt:
+                st.caption(f"Prompt tokens served from the provider cache: {cached:,} of {prompt:,} ({cached / prompt:.0%})")
+            st.table(st.session_state.token_log[-10:])
+
 # ===========  HISTORY TAB  ===========
-with tab_hist:
+@st.fragment
+def history_tab():
     st.subheader("Adaptation history")
+    query = st.text_input(
+        "Search all past adaptations",
+        placeholder="Words from the text, a grade or a date…",
+        key="archive_query",
+    )
+    if query.strip():
+        t0 = time.perf_counter()
+        try:
+            hits = search(query)
+        except sqlite3.Error as err:
+            st.error(f"Archive search failed: {err}")
+            hits = []
+        st.caption(f"{len(hits)} result(s) in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        for hit in hits:
+            c1, c2 = st.columns([6, 1])
+            c1.markdown(f"**{hit['timestamp']} — {hit['grade']}**  \n{hit['snippet']}")
+            if c2.button("Load", key=f"load_{hit['id']}", use_container_width=True):
+                # applied before the widgets are built on the next full run
+                st.session_state["_load_record"] = hit["id"]
+                st.rerun()
+        st.markdown("---")
     if st.session_state.history:
         pdf = history_pdf(st.session_state.history)
         if pdf:
@@ -436,13 +668,20 @@ with tab_hist:
             st.caption("Install reportlab to enable PDF export.")
         for rec in reversed(st.session_state.history[-10:]):
             with st.expander(f"{rec['timestamp']} — {rec['grade']}"):
-                st.write("**Original:**")
-                st.write(rec["original"])
-                st.write("**Adapted:**")
-                st.write(rec["adapted"])
+                st.write("**Original preview:**", preview(rec["original"]))
+                st.write("**Adapted preview:**", preview(rec["adapted"]))
     else:
         st.write("No history yet – run an adaptation first.")
 
+# ─────────────────────────  TABS  ─────────────────────────
+tab_adapt, tab_metrics, tab_hist = st.tabs(["Adapt Text", "Analytics", "History"])
+with tab_adapt:
+    adapt_tab()
+with tab_metrics:
+    metrics_tab()
+with tab_hist:
+    history_tab()
+
 # ─────────────────────────  FOOTER  ─────────────────────────
 st.markdown("---")
 st.markdown(
@@ -0,0 +1,44 @@
+"""
+Class-roster batch adaptation for ReadRight.
+
+Students whose profiles share the same settings get the same adaptation,
+so the roster is grouped into equivalence classes and each class costs
+one (concurrent) request; results are then fanned back out by name.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+SETTINGS = ("grade", "define", "short_p", "breaks")
+
+
+def settings_key(profile: dict) -> tuple:
+    return tuple(profile[k] for k in SETTINGS)
+
+
+def group_profiles(profiles) -> dict:
+    """{(grade, define, short_p, breaks): [student names]} in roster order."""
+    groups: dict = {}
+    for p in profiles:
+        groups.setdefault(settings_key(p), []).append(p["name"])
+    return groups
+
+
+def adapt_roster(profiles, adapt_fn, max_workers: int = 8):
+    """
+    Call adapt_fn(grade, define, short_p, breaks) once per equivalence
+    class, concurrently. Returns (per_student, per_class); a class whose
+    call raised maps to the exception instead of a result.
+    """
+    groups = group_profiles(profiles)
+    if not groups:
+        return {}, {}
+    per_class = {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(groups))) as pool:
+        futures = {key: pool.submit(adapt_fn, *key) for key in groups}
+        for key, fut in futures.items():
+            try:
+                per_class[key] = fut.result()
+            except Exception as err:
+                per_class[key] = err
+    per_student = {name: per_class[key] for key, names in groups.items() for name in names}
+    return per_student, per_class
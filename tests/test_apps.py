@@ -0,0 +1,86 @@
+"""
+End-to-end runs of both apps through Streamlit's AppTest, with the offline
+stub and record/replay backends (no network).
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("streamlit.testing.v1")
+import streamlit as st  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import backends  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS = ["app.py", "ptapp.py"]
+TEXT = "Photosynthesis feeds the ecosystem. Plants need sunlight.\n\nChlorophyll is green."
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch, tmp_path):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("READRIGHT_BACKEND", "stub")
+    monkeypatch.setenv("READRIGHT_ARCHIVE", str(tmp_path / "archive.db"))
+    monkeypatch.setenv("READRIGHT_CASSETTES", str(tmp_path / "cassettes"))
+    st.cache_resource.clear()  # load_backend() is cached per process
+    st.cache_data.clear()
+    yield
+    st.cache_resource.clear()
+
+
+def adapt(script, text=TEXT, **state):
+    at = AppTest.from_file(os.path.join(ROOT, script), default_timeout=60)
+    for key, value in state.items():
+        at.session_state[key] = value
+    at.run()
+    at.text_area(key="text_in").input(text).run()
+    at.button[0].click().run()
+    return at
+
+
+@pytest.mark.parametrize("script", APPS)
+def test_adapt_with_stub(script):
+    at = adapt(script)
+    assert not at.exception
+    assert at.session_state["adapted"] == "Photosynthesis feeds the ecosystem. Plants need sunlight.\n\nChlorophyll is green."
+    assert at.session_state["questions"].startswith("1. ")
+    assert [w.value for w in at.warning] == ["Still above 2nd Grade: chlorophyll, ecosystem, photosynthesis"]
+    assert any("Paragraphs" in m.value or "grid-template-columns" in m.value for m in at.markdown)
+
+
+@pytest.mark.parametrize("script", APPS)
+def test_record_then_replay(script, monkeypatch):
+    monkeypatch.setattr(backends, "OpenAIBackend", type("Offline", (backends.StubBackend,), {"__init__": lambda self: None}))
+    monkeypatch.setenv("READRIGHT_BACKEND", "record")
+    recorded = adapt(script).session_state["adapted"]
+
+    st.cache_resource.clear()
+    monkeypatch.setenv("READRIGHT_BACKEND", "replay")
+    at = adapt(script)
+    assert not at.exception and not at.error
+    assert at.session_state["adapted"] == recorded
+
+
+@pytest.mark.parametrize("script", APPS)
+def test_replay_miss_is_reported_not_raised(script, monkeypatch):
+    monkeypatch.setenv("READRIGHT_BACKEND", "replay")
+    at = adapt(script, "Nothing was recorded for this text.")
+    assert not at.exception
+    assert at.error[0].value.startswith("No recording for this request")
+
+
+def test_roster_with_stub():
+    profiles = [
+        {"name": f"S{i}", "grade": g, "define": True, "short_p": True, "breaks": False}
+        for i, g in enumerate(["1st Grade", "2nd Grade", "1st Grade"])
+    ]
+    at = AppTest.from_file(os.path.join(ROOT, "ptapp.py"), default_timeout=60)
+    at.session_state["profiles"] = profiles
+    at.run()
+    at.text_area(key="text_in").input(TEXT).run()
+    next(b for b in at.button if "roster" in b.label).click().run()
+    assert not at.exception
+    assert [s.value for s in at.success] == ["Adapted for 3 students in 2 distinct settings (4 model calls)."]
@@ -0,0 +1,44 @@
+import pytest
+
+import archive
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "archive.db")
+
+
+def test_search_ranks_and_snippets(db):
+    archive.add_record("2026-01-01 09:00", "2nd Grade", "Volcanoes erupt.", "Hot rock comes out.", path=db)
+    rec_id = archive.add_record(
+        "2026-01-02 09:00", "3rd Grade", "Photosynthesis feeds plants.", "Plants make food from sunlight.", "1. Why?", path=db
+    )
+    hits = archive.search("sunli", path=db)
+    assert [h["id"] for h in hits] == [rec_id]
+    assert "**sunlight**" in hits[0]["snippet"]
+
+
+def test_every_word_must_match(db):
+    archive.add_record("t", "2nd Grade", "plants and rocks", "", path=db)
+    archive.add_record("t", "2nd Grade", "plants only", "", path=db)
+    assert len(archive.search("plants", path=db)) == 2
+    assert len(archive.search("plants rocks", path=db)) == 1
+
+
+def test_punctuation_cannot_break_the_query(db):
+    archive.add_record("t", "2nd Grade", "plants", "", path=db)
+    assert archive.to_match('"drop" OR -- (') == '"drop"* "OR"*'
+    assert archive.search('")(*', path=db) == []
+
+
+def test_get_record_round_trip(db):
+    rec_id = archive.add_record("t", "5th Grade", "orig", "adapted", "qs", path=db)
+    rec = archive.get_record(rec_id, path=db)
+    assert (rec["grade"], rec["original"], rec["adapted"], rec["questions"]) == ("5th Grade", "orig", "adapted", "qs")
+    assert archive.get_record(rec_id + 1, path=db) is None
+
+
+def test_schema_is_created_once_per_path(db, monkeypatch):
+    archive.add_record("t", "2nd Grade", "a", "b", path=db)
+    monkeypatch.setattr(archive, "_SCHEMA", "this is not sql;")
+    assert len(archive.search("a", path=db)) == 1
@@ -0,0 +1,65 @@
+import json
+import os
+
+import pytest
+
+import backends
+from backends import Backend, BackendError, RecordReplayBackend, StubBackend, get_backend
+from prompts import adapt_messages, questions_messages
+
+TEXT = "Volcanoes erupt. Magma rises from deep inside. It is very hot.\n\nLava cools into rock."
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        Backend()
+
+
+def test_stub_is_deterministic_and_openai_shaped():
+    msgs = adapt_messages(TEXT, "2nd Grade", True, True, False, False)
+    a = StubBackend().complete("gpt-4o-mini", msgs)
+    b = StubBackend().complete("gpt-4o-mini", msgs)
+    assert a.choices[0].message.content == b.choices[0].message.content
+    assert a.choices[0].message.content == "Volcanoes erupt. Magma rises from deep inside.\n\nLava cools into rock."
+    assert a.choices[0].finish_reason == "stop"
+    assert a.usage.prompt_tokens > a.usage.completion_tokens > 0
+    assert a.usage.prompt_tokens_details.cached_tokens == 0
+
+
+def test_stub_questions_and_length_limit():
+    res = StubBackend().complete("gpt-4o-mini", questions_messages(TEXT, "2nd Grade"))
+    assert res.choices[0].message.content.startswith("1. What does the text tell us about **volcanoes**?")
+    cut = StubBackend().complete("gpt-4o-mini", adapt_messages(TEXT * 50, "2nd Grade", 1, 1, 0, 0), max_tokens=10)
+    assert cut.choices[0].finish_reason == "length"
+
+
+def test_record_then_replay(tmp_path):
+    store = str(tmp_path / "cassettes")
+    msgs = adapt_messages(TEXT, "3rd Grade", True, False, True, False)
+    recorded = RecordReplayBackend(store, inner=StubBackend()).complete("gpt-4o-mini", msgs, max_tokens=500)
+    (path,) = os.listdir(store)
+    with open(os.path.join(store, path), encoding="utf-8") as f:
+        assert json.load(f)["request"]["messages"] == msgs
+
+    # max_tokens is not part of the key, so a changed budget still replays
+    replayed = RecordReplayBackend(store).complete("gpt-4o-mini", msgs, max_tokens=900)
+    assert replayed.choices[0].message.content == recorded.choices[0].message.content
+    assert replayed.usage.prompt_tokens == recorded.usage.prompt_tokens
+
+
+def test_replay_miss_is_a_backend_error(tmp_path):
+    with pytest.raises(BackendError, match="No recording"):
+        RecordReplayBackend(str(tmp_path)).complete("gpt-4o-mini", adapt_messages("New text.", "2nd Grade", 1, 1, 1, 1))
+
+
+def test_get_backend(monkeypatch, tmp_path):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("READRIGHT_CASSETTES", str(tmp_path))
+    assert isinstance(get_backend("stub"), StubBackend)
+    assert get_backend("replay").store == str(tmp_path)
+    with pytest.raises(BackendError, match="OPENAI_API_KEY"):
+        get_backend("openai")
+    with pytest.raises(BackendError, match="Unknown"):
+        get_backend("carrier-pigeon")
+    monkeypatch.setattr(backends, "OpenAIBackend", StubBackend)
+    assert get_backend("record").name == "record"
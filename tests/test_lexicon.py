@@ -0,0 +1,50 @@
+import pytest
+
+from lexicon import find_hard_words, highlight, vocab_report, word_grade
+
+EASY = ["together", "everyone", "remember", "yesterday", "animals", "beautiful",
+        "different", "another", "understand", "computer", "somebody"]
+HARD = ["photosynthesis", "synthesize", "adenosine", "phosphorylation", "ratified"]
+
+
+@pytest.mark.parametrize("word", EASY)
+def test_everyday_words_are_not_flagged(word):
+    assert find_hard_words(word, "Kindergarten") == []
+
+
+@pytest.mark.parametrize("word", HARD)
+def test_rare_words_are_flagged(word):
+    assert [h[2] for h in find_hard_words(word, "Kindergarten")] == [word]
+
+
+def test_estimated_only_for_words_missing_from_the_lexicon():
+    hits = {h[2]: h for h in find_hard_words("photosynthesis and phosphorylation", "2nd Grade")}
+    assert hits["photosynthesis"][5] is False
+    assert hits["phosphorylation"][5] is True
+
+
+def test_inflections_use_the_base_word():
+    assert word_grade("ecosystems") == word_grade("ecosystem")
+    assert word_grade("remembered") == word_grade("remember") == 0
+
+
+def test_names_are_not_estimated():
+    assert find_hard_words("We visited Mississippi last year.", "Kindergarten") == []
+
+
+def test_definition_marks_word_as_defined():
+    (hit,) = find_hard_words("**photosynthesis** (how plants make food)", "2nd Grade")
+    assert hit[4] is True
+
+
+def test_easy_sentence_report_is_empty():
+    text = "Together everyone remember the animals. They were beautiful and different."
+    report = vocab_report(text, text, "2nd Grade")
+    assert report["not_simplified"] == []
+    assert report["adapted_count"] == 0
+
+
+def test_highlight_escapes_text():
+    text = "<b>photosynthesis</b>"
+    out = highlight(text, find_hard_words(text, "Kindergarten"))
+    assert "&lt;b&gt;" in out and "<mark" in out
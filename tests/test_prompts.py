@@ -0,0 +1,28 @@
+import pytest
+
+import tokens
+from lexicon import GRADES
+from prompts import HEADERS, SYSTEM_PREFIX, adapt_messages
+
+# providers only cache prompt prefixes of at least this many tokens
+MIN_CACHED_PREFIX = 1024
+
+
+def test_system_prefix_is_long_enough_to_cache(monkeypatch):
+    monkeypatch.setattr(tokens, "_scale", {})
+    enc = tokens._encoders.get("gpt-4o-mini")
+    # the offline estimate can be ~10% off the real tokenizer
+    margin = 1.0 if enc is not None else 1.1
+    assert tokens.count_tokens(SYSTEM_PREFIX) >= MIN_CACHED_PREFIX * margin
+
+
+def test_every_request_shares_the_same_prefix():
+    a = adapt_messages("Plants grow.", "Kindergarten", True, True, False, False)
+    b = adapt_messages("Rocks erode.", "9th Grade", False, False, True, True)
+    assert a[0] == b[0] == {"role": "system", "content": SYSTEM_PREFIX}
+    assert a[1]["content"].endswith("Text:\nPlants grow.")
+
+
+@pytest.mark.parametrize("grade", GRADES)
+def test_headers_are_precomputed(grade):
+    assert HEADERS[(grade, True, False, True, False)].startswith(f"TARGET {grade} · ")
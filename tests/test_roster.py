@@ -0,0 +1,54 @@
+import threading
+
+from roster import adapt_roster, group_profiles
+
+
+def profile(name, grade, define=True, short_p=True, breaks=False):
+    return {"name": name, "grade": grade, "define": define, "short_p": short_p, "breaks": breaks}
+
+
+ROSTER = [
+    profile("Ana", "2nd Grade"),
+    profile("Ben", "4th Grade"),
+    profile("Cy", "2nd Grade"),
+    profile("Di", "2nd Grade", breaks=True),
+]
+
+
+def test_group_profiles_by_settings():
+    groups = group_profiles(ROSTER)
+    assert groups == {
+        ("2nd Grade", True, True, False): ["Ana", "Cy"],
+        ("4th Grade", True, True, False): ["Ben"],
+        ("2nd Grade", True, True, True): ["Di"],
+    }
+
+
+def test_one_call_per_settings_group():
+    calls = []
+    lock = threading.Lock()
+
+    def adapt(grade, define, short_p, breaks):
+        with lock:
+            calls.append((grade, breaks))
+        return f"{grade}/{breaks}"
+
+    per_student, per_class = adapt_roster(ROSTER, adapt)
+    assert sorted(calls) == [("2nd Grade", False), ("2nd Grade", True), ("4th Grade", False)]
+    assert per_student == {"Ana": "2nd Grade/False", "Cy": "2nd Grade/False", "Ben": "4th Grade/False", "Di": "2nd Grade/True"}
+    assert len(per_class) == 3
+
+
+def test_a_failed_group_does_not_sink_the_others():
+    def adapt(grade, define, short_p, breaks):
+        if grade == "4th Grade":
+            raise RuntimeError("boom")
+        return "ok"
+
+    per_student, _ = adapt_roster(ROSTER, adapt)
+    assert isinstance(per_student["Ben"], RuntimeError)
+    assert per_student["Ana"] == per_student["Di"] == "ok"
+
+
+def test_empty_roster():
+    assert adapt_roster([], lambda *key: None) == ({}, {})
@@ -0,0 +1,71 @@
+import types
+
+import pytest
+
+import tokens
+
+
+@pytest.fixture(autouse=True)
+def fallback_estimator(monkeypatch):
+    """Run every test on the offline estimator with a fresh calibration."""
+    monkeypatch.setattr(tokens, "_encoders", {"gpt-4o-mini": None, "gpt-4o": None})
+    monkeypatch.setattr(tokens, "_scale", {})
+
+
+def test_estimate_close_to_real_tokenizer():
+    # o200k_base encodes this sentence as 10 tokens
+    assert tokens.count_tokens("The quick brown fox jumps over the lazy dog.") == 10
+
+
+def test_long_words_and_numbers_cost_more():
+    assert tokens.count_tokens("photosynthesis") == 3
+    assert tokens.count_tokens("1234567") == 3
+
+
+def test_calibration_moves_towards_actual_counts():
+    text = "word " * 1000
+    est = tokens.count_tokens(text)
+    for _ in range(20):
+        tokens.calibrate("gpt-4o-mini", tokens.count_tokens(text), 800)
+    assert est == 1000
+    assert abs(tokens.count_tokens(text) - 800) <= 10
+    assert tokens.count_tokens(text, "gpt-4o") == 1000  # per model
+
+
+def test_calibration_is_clamped():
+    for _ in range(50):
+        tokens.calibrate("gpt-4o-mini", tokens.count_tokens("word " * 100), 10_000)
+    assert tokens._scale["gpt-4o-mini"] == 2.0
+
+
+def test_special_tokens_in_user_text_are_counted_as_text(monkeypatch):
+    tiktoken = pytest.importorskip("tiktoken")
+    enc = tiktoken.Encoding(
+        name="bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={"<|endoftext|>": 256},
+    )
+    monkeypatch.setitem(tokens._encoders, "gpt-4o-mini", enc)
+    assert tokens.count_tokens("a <|endoftext|> b") == len("a <|endoftext|> b")
+
+
+def test_encoder_load_does_not_block(monkeypatch):
+    monkeypatch.setattr(tokens, "_encoders", {})
+    monkeypatch.setattr(tokens, "_loading", set())
+    started = []
+    monkeypatch.setattr(tokens.threading, "Thread", lambda **kw: types.SimpleNamespace(start=lambda: started.append(kw)))
+    assert tokens._encoder("gpt-4o-mini") is None
+    assert tokens._encoder("gpt-4o-mini") is None
+    assert len(started) == 1
+
+
+def test_adapt_budget_is_clamped():
+    assert tokens.adapt_budget("Hi.", "2nd Grade", "gpt-4o-mini") == 256
+    assert tokens.adapt_budget("word " * 100_000, "2nd Grade", "gpt-4o-mini") == 16_384
+
+
+def test_check_fit_flags_overflow():
+    msgs = [{"role": "user", "content": "word " * 20_000}]
+    assert tokens.check_fit(msgs, 4_096, "gpt-3.5-turbo")[1] == "overflow"
+    assert tokens.check_fit(msgs[:0], 100, "gpt-4o-mini")[1] is None
@@ -0,0 +1,36 @@
+from viewer import align_paragraphs, preview, split_paragraphs, window_html
+
+
+def test_split_paragraphs_drops_blank_runs():
+    assert split_paragraphs("a\n\n\n  \nb\n\n") == ["a", "b"]
+
+
+def test_alignment_keeps_every_paragraph_in_order():
+    original = "\n\n".join(f"Original {i} " + "x" * 50 for i in range(10))
+    adapted = "\n\n".join(f"Adapted {i} " + "y" * 20 for i in range(25))
+    pairs = align_paragraphs(original, adapted)
+    assert [o for o, _ in pairs] == split_paragraphs(original)
+    joined = "\n\n".join(a for _, a in pairs if a)
+    assert split_paragraphs(joined) == split_paragraphs(adapted)
+
+
+def test_alignment_with_an_empty_side():
+    assert align_paragraphs("", "") == []
+    assert align_paragraphs("one\n\ntwo", "") == [("one\n\ntwo", "")]
+
+
+def test_window_only_renders_the_requested_pairs():
+    pairs = [(f"o{i}", f"a{i}") for i in range(100)]
+    out = window_html(pairs, 20, 40, "2nd Grade")
+    assert "o20" in out and "o39" in out
+    assert "o19<" not in out and "o40<" not in out
+
+
+def test_window_escapes_and_keeps_blank_lines_inside_the_block():
+    out = window_html([("<b>x</b>\n\ny", "z")], 0, 1, "2nd Grade")
+    assert "&lt;b&gt;" in out and "\n\n" not in out.split("<h5")[-1]
+
+
+def test_preview():
+    assert preview("short") == "short"
+    assert preview("word " * 100, 20).endswith(" …")
@@ -0,0 +1,152 @@
+"""
+Local token estimation and max_tokens budgeting for ReadRight.
+
+Uses tiktoken once it is installed and its encoding has loaded; otherwise
+falls back to an estimator (one token per common word, one more per extra 4
+letters of a long word, one per punctuation mark) that is calibrated against
+the prompt_tokens the API reports, per model, as usage rows are logged.
+"""
+
+import math
+import re
+import threading
+
+from lexicon import grade_index
+
+# model → (context window, max completion tokens)
+MODEL_LIMITS = {
+    "gpt-4o-mini": (128_000, 16_384),
+    "gpt-4o": (128_000, 16_384),
+    "gpt-3.5-turbo": (16_385, 4_096),
+}
+_DEFAULT_LIMITS = (16_385, 4_096)
+_MSG_OVERHEAD = 4    # role / separator tokens per chat message
+_REPLY_PRIMER = 3
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+_WHOLE_WORD = 7      # words up to this length are usually a single token
+_CALIBRATION_RATE = 0.3
+_scale = {}          # model → actual / estimated prompt tokens (moving average)
+_encoders = {}       # model → tiktoken encoding, or None if it cannot be loaded
+_loading = set()
+_loading_lock = threading.Lock()
+
+
+def _load_encoder(model: str):
+    try:
+        import tiktoken
+
+        try:
+            enc = tiktoken.encoding_for_model(model)
+        except KeyError:
+            enc = tiktoken.get_encoding("o200k_base")
+    except Exception:  # not installed, or BPE file not cached and no network
+        enc = None
+    _encoders[model] = enc
+
+
+def _encoder(model: str):
+    """
+    The tiktoken encoding for `model`, or None while it is unavailable.
+    tiktoken may download its BPE file with no timeout, so the first call
+    starts the load in a background thread and callers use the estimator
+    until it is done.
+    """
+    if model in _encoders:
+        return _encoders[model]
+    with _loading_lock:
+        if model not in _loading:
+            _loading.add(model)
+            threading.Thread(target=_load_encoder, args=(model,), daemon=True).start()
+    return None
+
+
+def _piece_tokens(piece: str) -> int:
+    if piece.isdigit():
+        return math.ceil(len(piece) / 3)
+    if len(piece) <= _WHOLE_WORD or not piece[0].isalnum():
+        return 1
+    return 1 + math.ceil((len(piece) - _WHOLE_WORD) / 4)
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    enc = _encoder(model)
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    est = sum(_piece_tokens(p) for p in _PIECE_RE.findall(text))
+    return round(est * _scale.get(model, 1.0))
+
+
+def calibrate(model: str, estimated: int, actual: int):
+    """Move the fallback estimator for `model` towards an observed prompt count."""
+    if _encoder(model) is not None or not estimated or not actual:
+        return
+    scale = _scale.get(model, 1.0)
+    target = scale * actual / estimated
+    _scale[model] = min(2.0, max(0.5, scale + _CALIBRATION_RATE * (target - scale)))
+
+
+def count_messages(msgs, model: str = "gpt-4o-mini") -> int:
+    return sum(_MSG_OVERHEAD + count_tokens(m["content"], model) for m in msgs) + _REPLY_PRIMER
+
+
+def limits(model: str):
+    return MODEL_LIMITS.get(model, _DEFAULT_LIMITS)
+
+
+def adapt_budget(text: str, grade: str, model: str, define: bool = True, breaks: bool = False) -> int:
+    """
+    max_tokens for an adaptation: the input size scaled by how much the
+    grade and accommodations usually expand it, plus room for Markdown.
+    """
+    g = grade_index(grade)
+    factor = 1.3 if g <= 2 else 1.2 if g <= 5 else 1.1
+    if define:
+        factor += 0.25
+    if breaks:
+        factor += 0.05
+    est = int(count_tokens(text, model) * factor) + 150
+    return max(256, min(est, limits(model)[1]))
+
+
+def questions_budget(grade: str, model: str, n: int = 6) -> int:
+    per_q = 30 if grade_index(grade) <= 5 else 45
+    return min(n * per_q + 100, limits(model)[1])
+
+
+def check_fit(msgs, max_tokens: int, model: str):
+    """
+    Return (prompt_tokens, problem) where problem is None, "truncate"
+    (the reply may hit max_tokens) or "overflow" (won't fit the context).
+    """
+    prompt = count_messages(msgs, model)
+    context, cap = limits(model)
+    if prompt + max_tokens > context:
+        return prompt, "overflow"
+    if max_tokens >= cap:
+        return prompt, "truncate"
+    return prompt, None
+
+
+def usage_row(call: str, model: str, est_prompt: int, budget: int, res, ms: float = None) -> dict:
+    """One row of the estimated-vs-actual usage log; also calibrates the estimator."""
+    usage = getattr(res, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    calibrate(model, est_prompt, getattr(usage, "prompt_tokens", None))
+    return {
+        "call": call,
+        "model": model,
+        "est. prompt": est_prompt,
+        "prompt": getattr(usage, "prompt_tokens", None),
+        "cached": getattr(details, "cached_tokens", None),
+        "max_tokens": budget,
+        "completion": getattr(usage, "completion_tokens", None),
+        "finish": res.choices[0].finish_reason,
+        "ms": round(ms) if ms is not None else None,
+    }
+
+
+def cache_summary(rows):
+    """(cached prompt tokens, total prompt tokens) over the usage log."""
+    prompt = sum(r["prompt"] or 0 for r in rows)
+    cached = sum(r.get("cached") or 0 for r in rows)
+    return cached, prompt
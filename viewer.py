@@ -0,0 +1,80 @@
+"""
+Windowed side-by-side viewer for long documents.
+
+The original and adapted texts are split into paragraphs and aligned into
+pairs once; only a window of pairs is turned into HTML and sent to the
+browser. Each pair is one grid row, so both columns share a single scroll
+container and always stay in step.
+"""
+
+import html
+import re
+from bisect import bisect_right
+
+PAGE_SIZE = 20
+_PARA_RE = re.compile(r"\n\s*\n")
+
+
+def split_paragraphs(text: str):
+    return [p.strip() for p in _PARA_RE.split(text) if p.strip()]
+
+
+def align_paragraphs(original: str, adapted: str):
+    """
+    Pair every original paragraph with the adapted paragraphs that cover
+    the same stretch of the document, by relative position. Linear time;
+    returns [(original_para, adapted_paras_joined)].
+    """
+    o_paras = split_paragraphs(original)
+    a_paras = split_paragraphs(adapted)
+    if not o_paras or not a_paras:
+        return [("\n\n".join(o_paras), "\n\n".join(a_paras))] if o_paras or a_paras else []
+
+    # cumulative end offset of each original paragraph, as a fraction of the text
+    o_total = sum(len(p) for p in o_paras)
+    ends, acc = [], 0
+    for p in o_paras:
+        acc += len(p)
+        ends.append(acc / o_total)
+
+    buckets = [[] for _ in o_paras]
+    a_total = sum(len(p) for p in a_paras)
+    acc, last = 0, 0
+    for p in a_paras:
+        mid = (acc + len(p) / 2) / a_total
+        acc += len(p)
+        # never map backwards, so the reading order is preserved
+        last = max(last, min(bisect_right(ends, mid), len(o_paras) - 1))
+        buckets[last].append(p)
+    return [(o, "\n\n".join(b)) for o, b in zip(o_paras, buckets)]
+
+
+def _escape(text: str) -> str:
+    # newlines as entities: a blank line would end the Markdown HTML block
+    return html.escape(text).replace("\n", "&#10;")
+
+
+def window_html(pairs, start: int, stop: int, grade: str, height: int = 450, mark=None) -> str:
+    """
+    HTML for pairs[start:stop] only. `mark`, if given, turns a paragraph
+    into escaped HTML (e.g. with highlighted words) in place of plain escaping.
+    """
+    cell = "padding:10px 4px;border-top:1px solid #ececf0;white-space:pre-wrap;font-size:15px;"
+    head = "position:sticky;top:0;background:var(--background-color);padding:4px 0;margin:0;"
+    render = _escape if mark is None else (lambda text: mark(text).replace("\n", "&#10;"))
+    rows = "".join(
+        f'<div style="{cell}">{render(o)}</div><div style="{cell}">{render(a)}</div>'
+        for o, a in pairs[start:stop]
+    )
+    return f"""
+<div style="border:1px solid #d2d2d7;border-radius:12px;padding:0 20px 20px 20px;height:{height}px;overflow:auto;">
+  <div style="display:grid;grid-template-columns:1fr 1fr;column-gap:24px;">
+    <h5 style="{head}">Original</h5><h5 style="{head}">Adapted for {html.escape(grade)}</h5>
+    {rows}
+  </div>
+</div>
+"""
+
+
+def preview(text: str, limit: int = 300) -> str:
+    return text if len(text) <= limit else text[:limit].rstrip() + " …"